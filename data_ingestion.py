@@ -9,6 +9,7 @@ Modules:
     - sqlalchemy: For creating and managing the database engine.
     - logging: For logging the data ingestion process.
     - pandas: For data manipulation and analysis.
+    - pyarrow (optional): For parsing CSV files and caching them as parquet on disk.
 
 Functions:
     - create_engine: Creates a database engine.
@@ -16,20 +17,46 @@ Functions:
 """
 
 from sqlalchemy import create_engine, text
+from pathlib import Path
+from collections import OrderedDict
+import hashlib
 import logging
+import threading
 import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - only needed so pandas can read/write the parquet cache
+except ImportError:
+    pyarrow = None
 # Name our logger so we know that logs from this module come from the data_ingestion module
 logger = logging.getLogger('data_ingestion')
-# Set a basic logging message up that prints out a timestamp, the name of our logger, and the message
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_logging_configured = False
+
+
+def _ensure_logging_configured():
+    """
+    Sets a basic logging message up that prints out a timestamp, the name of our logger, and
+    the message. This runs the first time one of our functions is used rather than on import,
+    so importing the module (e.g. from the tests) does not touch the logging setup.
+    """
+    global _logging_configured
+    if not _logging_configured:
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        _logging_configured = True
+
+
+# Engines created by create_db_engine, keyed by db_path, so every caller shares one connection pool per database
+_engine_cache = {}
 
 
 def create_db_engine(db_path):
     """
     Creates a database engine using SQLAlchemy.
 
-    This function creates a database engine with the provided database path.
-    It tests the connection to ensure the engine is created successfully. If the engine
+    This function creates a database engine with the provided database path. Engines are
+    cached per db_path, so later calls with the same path return the same engine and reuse
+    its connection pool. No connection is opened here: SQLAlchemy connects lazily on first
+    use, and pool_pre_ping checks connections before they are handed out. If the engine
     is created, it logs a success message and returns the engine object. If there is an
     ImportError, it logs an error message indicating that SQLAlchemy is required. For any
     other exceptions, it logs the error message and raises the exception.
@@ -44,46 +71,59 @@ def create_db_engine(db_path):
         ImportError: If SQLAlchemy is not installed.
         Exception: If there is any other error in creating the database engine.
     """
+    _ensure_logging_configured()
+    if db_path in _engine_cache:
+        logger.debug("Reusing cached database engine.")
+        return _engine_cache[db_path]
     try:
-        engine = create_engine(db_path)
-        # Test connection
-        with engine.connect() as conn:
-            pass
-        # test if the database engine was created successfully
+        # No test connection here, pool_pre_ping checks each connection before use (and catches stale ones in the cache)
+        engine = create_engine(db_path, pool_pre_ping=True)
         logger.info("Database engine created successfully.")
+        _engine_cache[db_path] = engine
         return engine # Return the engine object if it all works well
-    except ImportError: #If we get an ImportError, inform the user SQLAlchemy is not installed
+    except ImportError as e: #If we get an ImportError, inform the user SQLAlchemy is not installed
         logger.error("SQLAlchemy is required to use this function. Please install it first.")
         raise e
     except Exception as e:# If we fail to create an engine inform the user
-        logger.error(f"Failed to create database engine. Error: {e}")
+        logger.error("Failed to create database engine. Error: %s", e)
         raise e
     
     
-def query_data(engine, sql_query):
+def query_data(engine, sql_query, chunksize=None):
     """
     Executes a SQL query and returns the result as a pandas DataFrame.
 
     This function connects to the database using the provided engine and executes the given
-    SQL query. It returns the result as a pandas DataFrame. If the query returns an empty
-    DataFrame, it logs an error message and raises a ValueError. For any other exceptions,
-    it logs the error message and raises the exception.
+    SQL query with SQLAlchemy Core. The rows are fetched as tuples and built into a pandas
+    DataFrame directly, which avoids the extra copies pd.read_sql_query makes. If the query
+    returns an empty DataFrame, it logs an error message and raises a ValueError. For any
+    other exceptions, it logs the error message and raises the exception.
+
+    If a chunksize is given, the query is run on a server-side cursor and a generator of
+    DataFrames with at most chunksize rows each is returned instead, so the full result
+    never has to sit in memory at once.
 
     Args:
         engine: The SQLAlchemy engine object used to connect to the database.
         sql_query (str): The SQL query to be executed.
+        chunksize (int, optional): The number of rows per chunk. Default is None (no chunking).
 
     Returns:
-        DataFrame: A pandas DataFrame containing the query results.
+        DataFrame: A pandas DataFrame containing the query results, or a generator of
+        DataFrames if chunksize is set.
 
     Raises:
         ValueError: If the query returns an empty DataFrame.
         Exception: If there is any other error in querying the database.
     """
+    _ensure_logging_configured()
+    if chunksize is not None:
+        return _query_data_chunks(engine, sql_query, chunksize)
     try:
         with engine.connect() as connection:
-            df = pd.read_sql_query(text(sql_query), connection)
-        if df.empty:
+            result = connection.execute(text(sql_query))
+            df = pd.DataFrame.from_records(result.fetchall(), columns=list(result.keys()), coerce_float=True)
+        if len(df.index) == 0:
             # Log a message or handle the empty DataFrame scenario as needed
             msg = "The query returned an empty DataFrame."
             logger.error(msg)
@@ -91,14 +131,98 @@ def query_data(engine, sql_query):
         logger.info("Query executed successfully.")
         return df
     except ValueError as e: 
-        logger.error(f"SQL query failed. Error: {e}")
+        logger.error("SQL query failed. Error: %s", e)
         raise e
     except Exception as e:
-        logger.error(f"An error occurred while querying the database. Error: {e}")
+        logger.error("An error occurred while querying the database. Error: %s", e)
         raise e
+
+
+def _query_data_chunks(engine, sql_query, chunksize):
+    """
+    Generator behind query_data(..., chunksize=...). Keeps the connection open with
+    stream_results enabled until the last chunk has been consumed.
+    """
+    try:
+        with engine.connect() as connection:
+            result = connection.execution_options(stream_results=True).execute(text(sql_query))
+            columns = list(result.keys())
+            chunks_read, rows_read = 0, 0
+            for rows in result.partitions(chunksize):
+                chunk = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+                chunks_read += 1
+                rows_read += len(chunk)
+                yield chunk
+        if rows_read == 0:
+            msg = "The query returned an empty DataFrame."
+            logger.error(msg)
+            raise ValueError(msg)
+        logger.info("Query executed successfully in %s chunks.", chunks_read)
+    except ValueError as e:
+        logger.error("SQL query failed. Error: %s", e)
+        raise e
+    except Exception as e:
+        logger.error("An error occurred while querying the database. Error: %s", e)
+        raise e
+
+
+# Where read_from_web_CSV keeps parquet copies of the CSV files it downloads
+CSV_CACHE_DIR = Path.home() / ".cache" / "md_agric"
+
+# DataFrames read_from_web_CSV has already read in this process, shared by every caller (e.g. all FieldDataProcessors).
+# Only the CSV_MEMORY_CACHE_SIZE most recently used are kept
+CSV_MEMORY_CACHE_SIZE = 4
+_csv_memory_cache = OrderedDict()
+# One lock per cache key, so a slow first read of one URL does not hold up reads of any other
+_csv_memory_cache_locks = {}
+_csv_memory_cache_lock = threading.Lock() # Only held briefly, to look up or change the two dicts above
+
+
+def _is_web_URL(URL):
+    """
+    Returns True for http(s) URLs, the only sources read_from_web_CSV caches.
+    """
+    return str(URL).startswith(("http://", "https://"))
+
+
+def _csv_cache_key(URL, read_csv_kwargs=None):
+    """
+    Returns the cache key for a URL. The read_csv arguments are part of the key, since they
+    change the DataFrame that gets cached.
+    """
+    return str(URL) + repr(sorted((read_csv_kwargs or {}).items()))
+
+
+def _has_stable_repr(value):
+    """
+    Returns True if repr(value) is the same in every run, so it can be part of a cache key
+    on disk. Callables (e.g. usecols=lambda ...) print their memory address, and the order of
+    a set of strings changes between runs, so neither qualifies.
+    """
+    if value is None or isinstance(value, (bool, int, float, str, bytes, type)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_has_stable_repr(item) for item in value)
+    if isinstance(value, dict):
+        return all(_has_stable_repr(key) and _has_stable_repr(item) for key, item in value.items())
+    return False
+
+
+def _csv_cache_path(URL, read_csv_kwargs=None):
+    """
+    Returns the parquet cache file for a web URL, or None if the URL should not be cached
+    (a local path, pyarrow is not installed, or a read_csv argument would give a different
+    key on every run and leave a cache file behind that is never read again).
+    """
+    if pyarrow is None or not _is_web_URL(URL):
+        return None
+    if not _has_stable_repr(read_csv_kwargs or {}):
+        return None
+    key = hashlib.blake2b(_csv_cache_key(URL, read_csv_kwargs).encode("utf-8"), digest_size=16).hexdigest()
+    return CSV_CACHE_DIR / f"{key}.parquet"
     
     
-def read_from_web_CSV(URL):
+def read_from_web_CSV(URL, use_cache=True, **read_csv_kwargs):
     """
     Reads a CSV file from a given URL and returns it as a pandas DataFrame.
 
@@ -108,8 +232,24 @@ def read_from_web_CSV(URL):
     EmptyDataError. For any other exceptions, it logs the error message and raises the
     exception.
 
+    The last CSV_MEMORY_CACHE_SIZE CSV files read from http(s) URLs are cached in memory,
+    and each call gets its own copy of the cached DataFrame. If pyarrow is installed, they
+    are also cached as parquet files in CSV_CACHE_DIR, keyed by a hash of the URL, so later
+    runs skip the download and parse. To pick up changes to the remote file, pass
+    use_cache=False, or delete the cache file and start a new process; within a running
+    process the memory cache keeps returning the frame it already read.
+
+    Unless an engine is passed in, the CSV is parsed with pandas' multithreaded pyarrow
+    engine. It falls back to the C engine with low_memory=False when pyarrow is missing or
+    does not support one of the read_csv_kwargs (e.g. nrows, or a callable usecols). Note
+    that the pyarrow engine infers timestamp columns (e.g. ISO dates come back as
+    datetime64 rather than strings); pass engine="c" or a dtype for those columns to keep
+    them as text.
+
     Args:
         URL (str): The URL pointing to the CSV file.
+        use_cache (bool): Whether to read from and write to the caches. Default is True.
+        **read_csv_kwargs: Passed on to pd.read_csv, e.g. index_col=0 or usecols=[...].
 
     Returns:
         DataFrame: A pandas DataFrame containing the CSV data.
@@ -118,13 +258,103 @@ def read_from_web_CSV(URL):
         pd.errors.EmptyDataError: If the URL does not point to a valid CSV file.
         Exception: If there is any other error in reading the CSV file from the web.
     """
+    _ensure_logging_configured()
+    if not use_cache or not _is_web_URL(URL):
+        return _read_CSV(URL, use_cache, read_csv_kwargs)
+    key = _csv_cache_key(URL, read_csv_kwargs)
+    df = _get_cached_CSV(key)
+    if df is not None:
+        logger.info("CSV file read successfully from memory.")
+    else:
+        with _csv_memory_cache_lock:
+            key_lock = _csv_memory_cache_locks.setdefault(key, threading.Lock())
+        # Hold the key's lock while reading, so concurrent callers for the same URL wait for the first read instead of all downloading the file
+        with key_lock:
+            df = _get_cached_CSV(key)
+            if df is None:
+                df = _read_CSV(URL, use_cache, read_csv_kwargs)
+                _put_cached_CSV(key, df)
+            else: # Another caller read it while we were waiting for the lock
+                logger.info("CSV file read successfully from memory.")
+    # Callers modify the DataFrame they get back (e.g. adding columns), so never hand out the cached one
+    return df.copy()
+
+
+def _get_cached_CSV(key):
+    """
+    Returns the DataFrame cached in memory under key, or None, marking it as most recently used.
+    """
+    with _csv_memory_cache_lock:
+        df = _csv_memory_cache.get(key)
+        if df is not None:
+            _csv_memory_cache.move_to_end(key)
+        return df
+
+
+def _put_cached_CSV(key, df):
+    """
+    Caches df in memory under key, dropping the least recently used entries (and their locks)
+    beyond CSV_MEMORY_CACHE_SIZE.
+    """
+    with _csv_memory_cache_lock:
+        _csv_memory_cache[key] = df
+        _csv_memory_cache.move_to_end(key)
+        while len(_csv_memory_cache) > CSV_MEMORY_CACHE_SIZE:
+            evicted_key, _ = _csv_memory_cache.popitem(last=False)
+            _csv_memory_cache_locks.pop(evicted_key, None)
+
+
+def _read_CSV(URL, use_cache, read_csv_kwargs):
+    """
+    Reads the CSV behind read_from_web_CSV, going through the parquet cache if use_cache is set.
+    """
+    cache_path = _csv_cache_path(URL, read_csv_kwargs) if use_cache else None
+    if cache_path is not None and cache_path.exists():
+        try:
+            df = pd.read_parquet(cache_path, engine="pyarrow")
+            logger.info("CSV file read successfully from the local cache.")
+            return df
+        except Exception as e: # A corrupt cache file should not stop us, fall back to the web
+            logger.warning("Failed to read cached CSV, reading from the web instead. Error: %s", e)
     try:
-        df = pd.read_csv(URL)
+        df = _parse_CSV(URL, read_csv_kwargs)
         logger.info("CSV file read successfully from the web.")
-        return df
     except pd.errors.EmptyDataError as e:
         logger.error("The URL does not point to a valid CSV file. Please check the URL and try again.")
         raise e
     except Exception as e:
-        logger.error(f"Failed to read CSV from the web. Error: {e}")
-        raise e
\ No newline at end of file
+        logger.error("Failed to read CSV from the web. Error: %s", e)
+        raise e
+    if cache_path is not None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(cache_path, engine="pyarrow", compression="zstd")
+        except Exception as e: # Caching is best effort only
+            logger.warning("Failed to cache CSV to %s. Error: %s", cache_path, e)
+    return df
+
+
+def _parse_CSV(URL, read_csv_kwargs):
+    """
+    Calls pd.read_csv, picking the pyarrow engine when no engine was given and pyarrow can
+    handle the other arguments, and the C engine with low_memory=False otherwise.
+    """
+    if "engine" in read_csv_kwargs:
+        return pd.read_csv(URL, **read_csv_kwargs)
+    c_engine_kwargs = {"low_memory": False, **read_csv_kwargs, "engine": "c"}
+    if pyarrow is None:
+        return pd.read_csv(URL, **c_engine_kwargs)
+    try:
+        df = pd.read_csv(URL, **read_csv_kwargs, engine="pyarrow")
+    except ValueError as e:
+        # pandas rejects options the pyarrow engine does not support before reading anything, so
+        # retry those with the C engine. Real parse errors (ParserError) are passed on as before
+        if isinstance(e, pd.errors.ParserError) or "pyarrow" not in str(e):
+            raise
+        logger.debug("The pyarrow engine does not support these read_csv options, using the C engine. Error: %s", e)
+        return pd.read_csv(URL, **c_engine_kwargs)
+    # pyarrow leaves blank header cells blank, the C engine calls them "Unnamed: <position>"
+    df.columns = [column if column != "" else f"Unnamed: {position}" for position, column in enumerate(df.columns)]
+    if df.index.name == "":
+        df.index.name = None
+    return df
\ No newline at end of file
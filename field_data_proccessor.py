@@ -12,9 +12,26 @@ class FieldDataProcessor:
         self.columns_to_rename = config_params["columns_to_rename"]
         self.values_to_rename = config_params["values_to_rename"]
         self.weather_map_data = config_params["weather_mapping_csv"]
+        self.chunksize = config_params.get("chunksize") # Optional: stream the SQL query in chunks of this many rows
+        # Optional: dtypes to load columns as, keyed by the final column names, e.g. {'Field_ID': 'int32', 'Soil_type': 'category'}
+        self.dtypes = config_params.get("dtypes") or {}
+        # Optional: the SQL query already applies the corrections (ABS on Elevation, crop type renames), so skip them in pandas
+        self.corrections_in_sql = config_params.get("corrections_in_sql", False)
+        # Optional: new columns computed from existing ones, e.g. {'Temp_range': 'Max_temperature_C - Min_temperature_C'}
+        self.derived_columns = config_params.get("derived_columns") or {}
         
         self.initialize_logging(logging_level)
 
+        if self.corrections_in_sql:
+            # The query must contain a {crop_type_corrections} placeholder, which is filled with the WHEN ... THEN ... clauses of a CASE
+            if "{crop_type_corrections}" not in self.sql_query:
+                msg = "corrections_in_sql is set, but the SQL query has no {crop_type_corrections} placeholder."
+                self.logger.error(msg)
+                raise ValueError(msg)
+            if "ABS(" not in self.sql_query.upper().replace(" ", ""):
+                self.logger.warning("corrections_in_sql is set, but the SQL query does not seem to take ABS() of Elevation.")
+            self.sql_query = self.sql_query.replace("{crop_type_corrections}", self.crop_type_corrections_sql())
+
         # We create empty objects to store the DataFrame and engine in
         self.df = None
         self.engine = None
@@ -57,44 +74,90 @@ class FieldDataProcessor:
 
         This method creates a database engine using the provided database path, executes an SQL
         query to retrieve data, and stores the result in a DataFrame attribute. It logs a success
-        message upon successful data loading.
+        message upon successful data loading. If a chunksize was given in the config, the query
+        is streamed in chunks which are then concatenated into a single DataFrame. Any dtypes
+        from the config are applied straight after loading.
 
         Returns:
             DataFrame: The DataFrame containing the ingested data.
         """
         self.engine = create_db_engine(self.db_path)
-        self.df = query_data(self.engine, self.sql_query)
+        if self.chunksize:
+            chunks = query_data(self.engine, self.sql_query, chunksize=self.chunksize)
+            self.df = pd.concat(chunks, ignore_index=True)
+        else:
+            self.df = query_data(self.engine, self.sql_query)
+        dtypes = self.sql_dtypes(self.df.columns)
+        if dtypes: # astype() copies the whole frame even with nothing to cast
+            self.df = self.df.astype(dtypes)
         self.logger.info("Sucessfully loaded data.")
         return self.df  
      
     
+    def sql_dtypes(self, columns):
+        """
+        Translates the configured dtypes to the column names as they come out of the SQL query.
+
+        The dtypes in the config use the final column names, but the columns in
+        columns_to_rename are only swapped after ingestion, so their dtypes have to be
+        looked up under the name each column will end up with.
+
+        Args:
+            columns (iterable): The column names returned by the SQL query.
+
+        Returns:
+            dict: The dtypes to cast the queried columns to.
+        """
+        dtypes = {}
+        for column in columns:
+            final_name = self.columns_to_rename.get(column, column)
+            if final_name in self.dtypes:
+                dtypes[column] = self.dtypes[final_name]
+        return dtypes
+    
     def rename_columns(self):
         """
         Renames two specified columns in the DataFrame by swapping their names.
 
-        This method extracts the column names to be swapped from the configuration, generates
-        a temporary name to avoid naming conflicts, and performs the renaming operation. It
-        logs the swap operation for tracking purposes.
+        This method extracts the column names to be swapped from the configuration and swaps
+        them with a single rename, since pandas applies the whole mapping in one pass. It logs
+        the swap operation for tracking purposes.
 
         Raises:
             KeyError: If the specified columns are not found in the DataFrame.
         """
-        # Extract the columns to rename from the configuration
-        column1, column2 = list(self.columns_to_rename.keys())[0], list(self.columns_to_rename.values())[0]
+        column1, column2 = self._rename(self.df)
+        
+        # Log the swap
+        self.logger.info("Swapped columns: %s with %s", column1, column2)
 
-        # Temporarily rename one of the columns to avoid a naming conflict
-        temp_name = "__temp_name_for_swap__"
-        while temp_name in self.df.columns:
-            temp_name += "_"
+    def _rename(self, df):
+        """
+        Swaps the first pair of columns in columns_to_rename on df in place and returns the pair.
+        """
+        # Extract the columns to rename from the configuration
+        column1 = next(iter(self.columns_to_rename))
+        column2 = self.columns_to_rename[column1]
 
         # Perform the swap
-        self.df = self.df.rename(columns={column1: temp_name, column2: column1})
-        self.df = self.df.rename(columns={temp_name: column2})
-        
-        # Log the swap
-        self.logger.info(f"Swapped columns: {column1} with {column2}")
+        df.rename(columns={column1: column2, column2: column1}, inplace=True)
+        return column1, column2
 
     
+    def crop_type_corrections_sql(self):
+        """
+        Builds the WHEN ... THEN ... clauses of a SQL CASE expression from values_to_rename.
+
+        Used to push the crop type corrections into the SQL query, e.g.
+        CASE Annual_yield {crop_type_corrections} ELSE Annual_yield END AS Annual_yield
+
+        Returns:
+            str: The WHEN clauses, with single quotes in the values escaped.
+        """
+        def quote(value):
+            return "'" + str(value).replace("'", "''") + "'"
+        return " ".join(f"WHEN {quote(old)} THEN {quote(new)}" for old, new in self.values_to_rename.items())
+
     def apply_corrections(self, column_name='Crop_type', abs_column='Elevation'):
         """
         Applies corrections to specified columns in the DataFrame.
@@ -103,6 +166,9 @@ class FieldDataProcessor:
         1. Converts all values in the specified column to their absolute values.
         2. Renames values in the specified column based on a predefined mapping.
 
+        If corrections_in_sql is set in the config, the SQL query has already done both and
+        this method does nothing.
+
         Args:
             column_name (str): The name of the column to apply value renaming. Default is 'Crop_type'.
             abs_column (str): The name of the column to convert values to absolute values. Default is 'Elevation'.
@@ -110,22 +176,82 @@ class FieldDataProcessor:
         Returns:
             None
         """
-        self.df[abs_column] = self.df[abs_column].abs()
-        self.df[column_name] = self.df[column_name].apply(lambda crop: self.values_to_rename.get(crop, crop))
+        if self.corrections_in_sql:
+            self.logger.debug("Corrections were applied in the SQL query, skipping.")
+            return
+        self._correct(self.df, column_name, abs_column)
+
+    def _correct(self, df, column_name='Crop_type', abs_column='Elevation'):
+        """
+        Applies the corrections described in apply_corrections to df in place.
+        """
+        df[abs_column] = df[abs_column].abs()
+        if isinstance(df[column_name].dtype, pd.CategoricalDtype):
+            # For a categorical column the function is only called once per category, then we cast back to a category
+            df[column_name] = df[column_name].map(lambda crop: self.values_to_rename.get(crop, crop)).astype('category')
+        else:
+            # map() does the dict lookup in one vectorised pass; values not in the mapping come back as NaN, so fill them with the original
+            df[column_name] = df[column_name].map(self.values_to_rename).fillna(df[column_name])
+
+    def add_derived_columns(self):
+        """
+        Adds the derived_columns from the config to the DataFrame.
+
+        Each expression is evaluated with DataFrame.eval, which uses numexpr when it is
+        installed, so the arithmetic runs in a single multithreaded pass without allocating
+        a temporary array for every intermediate result. The new column names can be any
+        string; column names that are not valid Python identifiers must be wrapped in
+        backticks inside the expressions, as DataFrame.eval requires.
+        """
+        self._derive(self.df)
+        if self.derived_columns:
+            self.logger.info("Added derived columns: %s", ", ".join(self.derived_columns))
+
+    def _derive(self, df):
+        """
+        Adds the derived_columns from the config to df in place.
+        """
+        for column, expression in self.derived_columns.items():
+            # Only the expression goes through eval, so the new column's name does not have to be a valid identifier
+            df[column] = df.eval(expression)
 
     def weather_station_mapping(self):
         """
         Merges the weather station data with the main DataFrame and returns the weather data.
         """
         if self.df is not None:
-            # Read the weather station mapping data from the URL into a DataFrame
-            weather_map_df= read_from_web_CSV(self.weather_map_data)
+            weather_map_df = self.read_weather_map()
             
             # Perform the merge
-            self.df = pd.merge(self.df, weather_map_df, on='Field_ID', how='left')
+            self.df = self._merge(self.df, weather_map_df.set_index('Field_ID'))
             
             # Return the weather data
             return weather_map_df
+
+    def read_weather_map(self):
+        """
+        Reads the weather station mapping data from the URL into a DataFrame.
+        """
+        # Use the unnamed first column as the index so it never becomes a column
+        return read_from_web_CSV(self.weather_map_data, index_col=0, dtype=self.dtypes or None)
+
+    def _merge(self, df, weather_map_df):
+        """
+        Left joins df with a weather station map that is already indexed by Field_ID.
+
+        If Field_ID was loaded as a category (see the dtypes config), both sides are given the
+        same categories first.
+        """
+        if isinstance(df['Field_ID'].dtype, pd.CategoricalDtype):
+            # Give both sides the same categories so the join compares integer codes. The CSV reader may
+            # type the map's categories differently (e.g. str), so cast its keys to the SQL side's type first
+            field_ids = df['Field_ID'].cat.categories
+            map_ids = weather_map_df.index.astype(field_ids.dtype)
+            categories = field_ids.union(map_ids.unique())
+            df['Field_ID'] = df['Field_ID'].cat.set_categories(categories)
+            weather_map_df = weather_map_df.set_axis(pd.CategoricalIndex(map_ids, categories=categories, name='Field_ID'))
+        # Joining against the indexed map only has to look up each Field_ID on the right-hand side
+        return df.join(weather_map_df, on='Field_ID', how='left')
        
 
     def process(self):
@@ -135,5 +261,34 @@ class FieldDataProcessor:
         self.ingest_sql_data()
         self.rename_columns()
         self.apply_corrections()
+        self.add_derived_columns()
         self.weather_station_mapping()
-        self.df = self.df.drop(columns="Unnamed: 0") # Drop "Unnamed: 0" from the merged self.df
\ No newline at end of file
+
+    def process_chunks(self, chunksize=None):
+        """
+        Runs the processing pipeline one chunk of the SQL query at a time.
+
+        Each chunk is cast to the configured dtypes, has its columns swapped, corrections
+        applied and derived columns added, and is joined with the weather station map before
+        it is yielded, so only one chunk needs to be in memory at a time. The weather station
+        map is read once up front. Unlike process(), self.df is left untouched.
+
+        Args:
+            chunksize (int): The number of rows per chunk. Defaults to the chunksize in the
+                config, or 50,000 rows if none was given.
+
+        Yields:
+            DataFrame: The processed rows of each chunk.
+        """
+        chunksize = chunksize or self.chunksize or 50_000
+        self.engine = create_db_engine(self.db_path)
+        weather_map_df = self.read_weather_map().set_index('Field_ID')
+        for chunk in query_data(self.engine, self.sql_query, chunksize=chunksize):
+            dtypes = self.sql_dtypes(chunk.columns)
+            if dtypes:
+                chunk = chunk.astype(dtypes)
+            self._rename(chunk)
+            if not self.corrections_in_sql:
+                self._correct(chunk)
+            self._derive(chunk)
+            yield self._merge(chunk, weather_map_df)
\ No newline at end of file
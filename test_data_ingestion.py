@@ -0,0 +1,116 @@
+from collections import OrderedDict
+import pandas as pd
+import pytest
+import data_ingestion
+
+# A made-up URL; the fixture below serves it from a local file so no test needs the network
+WEB_URL = "https://example.com/Weather_data_field_mapping.csv"
+
+
+# Define pytest fixture that serves WEB_URL from a temporary CSV and isolates both caches
+@pytest.fixture
+def web_csv(tmp_path, monkeypatch):
+    csv_path = tmp_path / "Weather_data_field_mapping.csv"
+    pd.DataFrame({"Field_ID": [40734, 30629, 39924], "Weather_station": [4, 0, 1]}).to_csv(csv_path)
+
+    read_csv = pd.read_csv
+    web_reads = []
+
+    def read_csv_from_web(URL, *args, **kwargs):
+        if str(URL).startswith(WEB_URL): # Query strings give the tests more URLs for the same file
+            web_reads.append(kwargs)
+            URL = csv_path
+        return read_csv(URL, *args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_csv", read_csv_from_web)
+    monkeypatch.setattr(data_ingestion, "CSV_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(data_ingestion, "_csv_memory_cache", OrderedDict())
+    monkeypatch.setattr(data_ingestion, "_csv_memory_cache_locks", {})
+    return web_reads
+
+
+def cached_files():
+    return sorted(data_ingestion.CSV_CACHE_DIR.glob("*.parquet"))
+
+
+# Test cases
+def test_cold_read_writes_parquet_and_warm_read_uses_it(web_csv):
+    """Check the first read caches the CSV as parquet and the next read comes from that file."""
+    pytest.importorskip("pyarrow")
+    cold_df = data_ingestion.read_from_web_CSV(WEB_URL)
+    assert len(web_csv) == 1, "Cold read did not read the CSV"
+    assert len(cached_files()) == 1, "Cold read did not write a parquet file"
+
+    data_ingestion._csv_memory_cache.clear() # Only the parquet cache is left to hit
+    warm_df = data_ingestion.read_from_web_CSV(WEB_URL)
+    assert len(web_csv) == 1, "Warm read did not use the parquet cache"
+    pd.testing.assert_frame_equal(warm_df, cold_df)
+
+def test_corrupt_parquet_falls_back_to_reading_the_CSV(web_csv):
+    """Ensure a corrupt cache file is ignored and the CSV is read again."""
+    pytest.importorskip("pyarrow")
+    expected_df = data_ingestion.read_from_web_CSV(WEB_URL)
+    cached_files()[0].write_bytes(b"not a parquet file")
+
+    data_ingestion._csv_memory_cache.clear()
+    df = data_ingestion.read_from_web_CSV(WEB_URL)
+    assert len(web_csv) == 2, "Corrupt cache file was not replaced by a normal read"
+    pd.testing.assert_frame_equal(df, expected_df)
+
+def test_use_cache_false_bypasses_both_caches(web_csv):
+    """Check use_cache=False reads the CSV every time and caches nothing."""
+    data_ingestion.read_from_web_CSV(WEB_URL, use_cache=False)
+    data_ingestion.read_from_web_CSV(WEB_URL, use_cache=False)
+    assert len(web_csv) == 2, "use_cache=False did not read the CSV every time"
+    assert not data_ingestion.CSV_CACHE_DIR.exists(), "use_cache=False wrote to the parquet cache"
+    assert not data_ingestion._csv_memory_cache, "use_cache=False wrote to the memory cache"
+
+def test_read_csv_kwargs_change_the_cache_key(web_csv):
+    """Validate that the same URL read with different kwargs is cached separately."""
+    plain_df = data_ingestion.read_from_web_CSV(WEB_URL)
+    indexed_df = data_ingestion.read_from_web_CSV(WEB_URL, index_col=0)
+    assert len(web_csv) == 2, "Different read_csv kwargs were served from the same cache entry"
+    assert "Unnamed: 0" in plain_df.columns
+    assert "Unnamed: 0" not in indexed_df.columns
+    if data_ingestion.pyarrow is not None:
+        assert len(cached_files()) == 2, "Different read_csv kwargs share a parquet file"
+
+def test_memory_cache_serves_repeat_reads(web_csv):
+    """Check a second read of the same URL in this process does not read the CSV again."""
+    first_df = data_ingestion.read_from_web_CSV(WEB_URL)
+    second_df = data_ingestion.read_from_web_CSV(WEB_URL)
+    assert len(web_csv) == 1, "Repeat read was not served from memory"
+    pd.testing.assert_frame_equal(second_df, first_df)
+
+def test_changing_returned_copy_does_not_change_cache(web_csv):
+    """Ensure callers get their own copy of the cached DataFrame."""
+    df = data_ingestion.read_from_web_CSV(WEB_URL)
+    expected_df = df.copy()
+    df["Measurement"] = "Rainfall"
+    df.loc[0, "Weather_station"] = 99
+
+    cached_df = data_ingestion.read_from_web_CSV(WEB_URL)
+    assert len(web_csv) == 1
+    pd.testing.assert_frame_equal(cached_df, expected_df)
+
+def test_callable_kwargs_skip_the_parquet_cache(web_csv):
+    """Ensure kwargs without a stable repr, like a callable usecols, never write a parquet file."""
+    df = data_ingestion.read_from_web_CSV(WEB_URL, usecols=lambda column: column != "Weather_station")
+    assert list(df.columns) == ["Unnamed: 0", "Field_ID"]
+    assert not cached_files(), "A callable kwarg was written to the parquet cache"
+
+def test_memory_cache_keeps_only_the_most_recently_used(web_csv, monkeypatch):
+    """Check the memory cache is bounded and evicts the least recently used URL first."""
+    monkeypatch.setattr(data_ingestion, "pyarrow", None) # Leave the parquet cache out of this test
+    urls = [f"{WEB_URL}?version={i}" for i in range(data_ingestion.CSV_MEMORY_CACHE_SIZE + 1)]
+    for url in urls[:-1]:
+        data_ingestion.read_from_web_CSV(url)
+    data_ingestion.read_from_web_CSV(urls[0]) # urls[0] is now the most recently used, urls[1] the least
+    data_ingestion.read_from_web_CSV(urls[-1])
+    assert len(data_ingestion._csv_memory_cache) == data_ingestion.CSV_MEMORY_CACHE_SIZE
+    assert len(web_csv) == len(urls)
+
+    data_ingestion.read_from_web_CSV(urls[0])
+    assert len(web_csv) == len(urls), "Most recently used URL was evicted"
+    data_ingestion.read_from_web_CSV(urls[1])
+    assert len(web_csv) == len(urls) + 1, "Least recently used URL was not evicted"
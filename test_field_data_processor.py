@@ -0,0 +1,161 @@
+import shutil
+import sqlite3
+from pathlib import Path
+import pandas as pd
+import pytest
+from data_ingestion import create_db_engine, query_data
+from field_data_proccessor import FieldDataProcessor
+
+# The farm survey database that ships with the repo
+db_file = Path(__file__).parent / "Maji_Ndogo_farm_survey_small.db"
+db_path = f"sqlite:///{db_file}"
+
+
+# Define pytest fixture with the pipeline config, using a local weather station map in the same layout as the web one
+@pytest.fixture
+def config_params(tmp_path):
+    with sqlite3.connect(db_file) as conn:
+        field_ids = [row[0] for row in conn.execute("SELECT Field_ID FROM geographic_features")]
+    weather_map_csv = tmp_path / "Weather_data_field_mapping.csv"
+    pd.DataFrame({"Field_ID": field_ids, "Weather_station": [i % 5 for i in range(len(field_ids))]}).to_csv(weather_map_csv)
+
+    return {
+        "db_path": db_path,
+        "sql_query": """
+            SELECT *
+            FROM geographic_features
+            LEFT JOIN weather_features USING (Field_ID)
+            LEFT JOIN soil_and_crop_features USING (Field_ID)
+            LEFT JOIN farm_management_features USING (Field_ID)
+            """,
+        "columns_to_rename": {'Annual_yield': 'Crop_type', 'Crop_type': 'Annual_yield'},
+        "values_to_rename": {'cassaval': 'cassava', 'wheatn': 'wheat', 'teaa': 'tea'},
+        "weather_mapping_csv": str(weather_map_csv),
+    }
+
+
+# Test cases
+@pytest.mark.parametrize("chunksize", [7, 1000, 100_000])
+def test_process_chunks_matches_process(config_params, chunksize):
+    """Check the chunks from process_chunks add up to the DataFrame process() builds."""
+    processor = FieldDataProcessor(config_params, logging_level="NONE")
+    processor.process()
+
+    chunks = list(FieldDataProcessor(config_params, logging_level="NONE").process_chunks(chunksize))
+    assert all(len(chunk) <= chunksize for chunk in chunks), "Chunk larger than chunksize"
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), processor.df)
+
+def test_chunked_query_on_empty_result_raises():
+    """Ensure a chunked query that returns no rows raises a ValueError."""
+    chunks = query_data(create_db_engine(db_path), "SELECT * FROM geographic_features WHERE 1 = 0", chunksize=100)
+    with pytest.raises(ValueError):
+        list(chunks)
+
+@pytest.mark.parametrize("dtype", ["float64", "Float64"])
+def test_apply_corrections_with_missing_elevation(config_params, dtype):
+    """Ensure Elevation is made non-negative in the frame itself, also for nullable dtypes with NA."""
+    elevation = pd.Series([-12.5, None, 30.0, -0.5], dtype=dtype)
+    original_df = pd.DataFrame({"Elevation": elevation, "Crop_type": ["teaa", "tea", "cassaval", "rice"]})
+    processor = FieldDataProcessor(config_params, logging_level="NONE")
+    processor.df = original_df.copy(deep=False)
+    processor.apply_corrections()
+
+    expected = pd.Series([12.5, None, 30.0, 0.5], dtype=dtype, name="Elevation")
+    pd.testing.assert_series_equal(processor.df["Elevation"], expected)
+    assert list(processor.df["Crop_type"]) == ["tea", "tea", "cassava", "rice"]
+    # Correcting a shallow copy must not reach back into the original frame
+    pd.testing.assert_series_equal(original_df["Elevation"], elevation.rename("Elevation"))
+
+# The default query with the corrections done by SQLite, in the same column order as SELECT *
+corrections_in_sql_query = """
+    SELECT g.Field_ID, ABS(g.Elevation) AS Elevation, g.Latitude, g.Longitude, g.Location, g.Slope,
+        w.Rainfall, w.Min_temperature_C, w.Max_temperature_C, w.Ave_temps,
+        s.Soil_fertility, s.Soil_type, s.pH,
+        f.Pollution_level, f.Plot_size, f.Crop_type,
+        CASE f.Annual_yield {crop_type_corrections} ELSE f.Annual_yield END AS Annual_yield,
+        f.Standard_yield
+    FROM geographic_features g
+    LEFT JOIN weather_features w USING (Field_ID)
+    LEFT JOIN soil_and_crop_features s USING (Field_ID)
+    LEFT JOIN farm_management_features f USING (Field_ID)
+    """
+
+def test_corrections_in_sql_matches_pandas_corrections(config_params):
+    """Check doing the corrections in SQL gives the same DataFrame as doing them in pandas."""
+    processor = FieldDataProcessor(config_params, logging_level="NONE")
+    processor.process()
+
+    sql_config = {**config_params, "sql_query": corrections_in_sql_query, "corrections_in_sql": True}
+    sql_processor = FieldDataProcessor(sql_config, logging_level="NONE")
+    sql_processor.process()
+    pd.testing.assert_frame_equal(sql_processor.df, processor.df)
+
+    chunks = FieldDataProcessor(sql_config, logging_level="NONE").process_chunks(1000)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), processor.df)
+
+def test_corrections_in_sql_without_placeholder_raises(config_params):
+    """Ensure corrections_in_sql is refused for a query that cannot apply the crop type corrections."""
+    with pytest.raises(ValueError):
+        FieldDataProcessor({**config_params, "corrections_in_sql": True}, logging_level="NONE")
+
+def test_crop_type_corrections_sql_escapes_quotes(config_params):
+    """Validate that quotes in values_to_rename are escaped in the generated SQL."""
+    config_params = {**config_params, "values_to_rename": {"teaa": "tea", "farmer's tea": "tea'"},
+                     "sql_query": corrections_in_sql_query, "corrections_in_sql": True}
+    processor = FieldDataProcessor(config_params, logging_level="NONE")
+    assert processor.crop_type_corrections_sql() == "WHEN 'teaa' THEN 'tea' WHEN 'farmer''s tea' THEN 'tea'''"
+
+    processor.process() # The escaped query must still run
+    assert "teaa" not in set(processor.df["Crop_type"])
+
+def test_derived_columns(config_params):
+    """Check derived columns match plain column arithmetic, with and without chunking."""
+    config_params = {**config_params, "derived_columns": {
+        "Temp_range": "Max_temperature_C - Min_temperature_C",
+        "Temp range (C)": "(Max_temperature_C - Min_temperature_C) / 2",
+    }}
+    processor = FieldDataProcessor(config_params, logging_level="NONE")
+    processor.process()
+    chunked_df = pd.concat(FieldDataProcessor(config_params, logging_level="NONE").process_chunks(1000), ignore_index=True)
+
+    for df in [processor.df, chunked_df]:
+        temp_range = df["Max_temperature_C"] - df["Min_temperature_C"]
+        pd.testing.assert_series_equal(df["Temp_range"], temp_range, check_names=False)
+        pd.testing.assert_series_equal(df["Temp range (C)"], temp_range / 2, check_names=False)
+    pd.testing.assert_frame_equal(chunked_df, processor.df)
+
+def test_dtypes_downcast_ints(config_params):
+    """Check integer dtypes from the config reach both the SQL data and the weather station map."""
+    processor = FieldDataProcessor(config_params, logging_level="NONE")
+    processor.process()
+    typed = FieldDataProcessor({**config_params, "dtypes": {"Field_ID": "int32", "Weather_station": "int16"}}, logging_level="NONE")
+    typed.process()
+
+    assert typed.df["Field_ID"].dtype == "int32"
+    assert typed.df["Weather_station"].dtype == "int16"
+    pd.testing.assert_frame_equal(typed.df, processor.df, check_dtype=False)
+
+def test_dtypes_categorical_crop_type(config_params):
+    """Ensure a categorical Crop_type stays categorical and still gets its values corrected."""
+    processor = FieldDataProcessor(config_params, logging_level="NONE")
+    processor.process()
+    typed = FieldDataProcessor({**config_params, "dtypes": {"Crop_type": "category"}}, logging_level="NONE")
+    typed.process()
+
+    assert isinstance(typed.df["Crop_type"].dtype, pd.CategoricalDtype)
+    assert not {"cassaval", "wheatn", "teaa"} & set(typed.df["Crop_type"].cat.categories)
+    assert list(typed.df["Crop_type"]) == list(processor.df["Crop_type"])
+
+def test_dtypes_nullable_elevation_with_missing_value(config_params, tmp_path):
+    """Validate a nullable float Elevation with a NULL is loaded as such and fully corrected."""
+    db_copy = tmp_path / "farm_survey_with_null.db"
+    shutil.copy(db_file, db_copy)
+    with sqlite3.connect(db_copy) as conn:
+        conn.execute("UPDATE geographic_features SET Elevation = NULL WHERE Field_ID = (SELECT MIN(Field_ID) FROM geographic_features)")
+    config_params = {**config_params, "db_path": f"sqlite:///{db_copy}", "dtypes": {"Elevation": "Float64"}}
+    processor = FieldDataProcessor(config_params, logging_level="NONE")
+    processor.process()
+
+    assert processor.df["Elevation"].dtype == "Float64"
+    assert processor.df["Elevation"].isna().sum() == 1
+    assert (processor.df["Elevation"].dropna() >= 0).all(), "Elevation values contain negatives"
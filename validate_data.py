@@ -1,8 +1,8 @@
-import os
 import sys
 import pandas as pd
 import pytest
 import importlib.util
+from pathlib import Path
 
 # Helper function to load modules
 def load_module_from_path(module_name, file_path):
@@ -45,11 +45,12 @@ def cleanup_files():
     """
     Deletes the sample CSV files if they exist.
     """
-    for file_path in [weather_csv_path, field_csv_path]:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    for file_path in [Path(weather_csv_path), Path(field_csv_path)]:
+        # Just try the delete, rather than checking first and racing whoever else touches the file
+        try:
+            file_path.unlink()
             print(f"Deleted {file_path}")
-        else:
+        except FileNotFoundError:
             print(f"{file_path} does not exist.")
 
 # Define pytest fixture to set up and tear down
@@ -59,27 +60,32 @@ def setup_and_teardown():
     yield
     cleanup_files()
 
+# Read each CSV once per module and share the DataFrame between the tests
+@pytest.fixture(scope="module")
+def weather_df(setup_and_teardown):
+    return pd.read_csv(weather_csv_path)
+
+@pytest.fixture(scope="module")
+def field_df(setup_and_teardown):
+    return pd.read_csv(field_csv_path)
+
 # Test cases
-def test_read_weather_DataFrame_shape(setup_and_teardown):
+def test_read_weather_DataFrame_shape(weather_df):
     """Check if the weather DataFrame has at least one row and expected columns."""
-    weather_df = pd.read_csv(weather_csv_path)
     assert weather_df.shape[0] > 0, "Weather DataFrame has no rows"
 
-def test_read_field_DataFrame_shape(setup_and_teardown):
+def test_read_field_DataFrame_shape(field_df):
     """Check if the field DataFrame has at least one row and expected columns."""
-    field_df = pd.read_csv(field_csv_path)
     assert field_df.shape[0] > 0, "Field DataFrame has no rows"
 
-def test_weather_DataFrame_columns(setup_and_teardown):
+def test_weather_DataFrame_columns(weather_df):
     """Validate the presence of required columns in the weather DataFrame."""
-    weather_df = pd.read_csv(weather_csv_path)
     expected_columns = ['Weather_station_ID', 'Message', 'Measurement', 'Value']
     for column in expected_columns:
         assert column in weather_df.columns, f"Weather DataFrame missing column: {column}"
 
-def test_field_DataFrame_columns(setup_and_teardown):
+def test_field_DataFrame_columns(field_df):
     """Validate the presence of required columns in the field DataFrame."""
-    field_df = pd.read_csv(field_csv_path)
     expected_columns = ['Field_ID', 'Elevation', 'Latitude', 'Longitude', 'Location', 'Slope',
        'Rainfall', 'Min_temperature_C', 'Max_temperature_C', 'Ave_temps',
        'Soil_fertility', 'Soil_type', 'pH', 'Pollution_level', 'Plot_size',
@@ -87,21 +93,18 @@ def test_field_DataFrame_columns(setup_and_teardown):
     for column in expected_columns:
         assert column in field_df.columns, f"Field DataFrame missing column: {column}"
 
-def test_field_DataFrame_non_negative_elevation(setup_and_teardown):
+def test_field_DataFrame_non_negative_elevation(field_df):
     """Ensure elevation values are non-negative in the field DataFrame."""
-    field_df = pd.read_csv(field_csv_path)
     assert (field_df["Elevation"] >= 0).all(), "Elevation values contain negatives"
 
-def test_crop_types_are_valid(setup_and_teardown):
+def test_crop_types_are_valid(field_df):
     """Check if crop types in the field DataFrame are valid."""
-    field_df = pd.read_csv(field_csv_path)
     valid_crop_types = {'cassava', 'tea', 'wheat', 'potato', 'banana', 'coffee', 'rice',
        'maize', 'wheat ', 'tea ', 'cassava '} 
     assert set(field_df["Crop_type"]).issubset(valid_crop_types), "Field DataFrame has invalid crop types"
 
-def test_positive_rainfall_values(setup_and_teardown):
+def test_positive_rainfall_values(field_df):
     """Ensure rainfall values are positive in the weather DataFrame."""
-    field_df = pd.read_csv(field_csv_path)
     assert (field_df["Rainfall"] > 0).all(), "Rainfall contains non-positive values"
 
 # Run validation and cleanup manually if running as a standalone script
@@ -46,7 +46,7 @@ class WeatherDataProcessor:
         for key, pattern in self.patterns.items():
             match = re.search(pattern, message)
             if match:
-                self.logger.debug(f"Measurement extracted: {key}")
+                self.logger.debug("Measurement extracted: %s", key)
                 return key, float(next((x for x in match.groups() if x is not None)))
         self.logger.debug("No measurement match found.")
         return None, None